@@ -17,164 +17,457 @@ Env:
 - MCP_TRANSPORT: stdio|http|sse (default: stdio)
 - MCP_HTTP_HOST, MCP_HTTP_PORT, MCP_HTTP_PATH (defaults: 0.0.0.0, 8080, /mcp)
 - ENABLE_RUN_COMMANDS: "1" to enable run tool (default: disabled)
+- MCP_PARALLEL_STAT: "1" to stat list_dir entries from a thread pool (network filesystems)
+- MCP_PARALLEL_STAT_WORKERS: size of that thread pool (default: 32)
+- STAT_CACHE_TTL: seconds to reuse lstat results across calls (default: 0 = off; outside changes may look stale that long)
+- READ_DONTNEED_BYTES: read_text drops files this large from the page cache (default: 8 MB)
 """
 from __future__ import annotations
-import os, io, glob, shutil, time, subprocess
-from pathlib import PurePath
-from typing import List, Dict, Any, Optional
+import os, sys, posixpath, re, fnmatch, heapq, operator, shutil, time, subprocess
+import asyncio, functools, locale, threading
+from stat import S_ISDIR, S_ISLNK
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from mcp.server.fastmcp import FastMCP
 
 # ---------- Configuration ----------
 ROOT_DIR = os.environ.get("MCP_FS_ROOT", os.path.abspath("./sandbox"))
 ENABLE_RUN_COMMANDS = os.environ.get("ENABLE_RUN_COMMANDS", "0") == "1"
+TRANSPORT = os.environ.get("MCP_TRANSPORT", "stdio").lower()
+# HTTP/SSE serve concurrent requests on one event loop; stdio is one request at a time.
+ASYNC_IO = TRANSPORT in ("http", "sse")
 
 ALLOW_GLOBS: List[str] = ["*", "**/*"]
 DENY_GLOBS:  List[str] = [
     "**/.env*", "**/.ssh/**", "**/.git/**", "**/node_modules/**", "**/id_*"
 ]
 
-COMMAND_ALLOWLIST: Dict[str, List[str]] = {
-    "bash":   ["-lc"],
-    "sh":     ["-lc"],
-    "python": ["-V"],
-    "pip":    ["--version"],
+COMMAND_ALLOWLIST: Dict[str, Tuple[str, ...]] = {
+    "bash":   ("-lc",),
+    "sh":     ("-lc",),
+    "python": ("-V",),
+    "pip":    ("--version",),
 }
 RUN_TIMEOUT_SEC = int(os.environ.get("RUN_TIMEOUT_SEC", "30"))
 RUN_MAX_STDOUT  = int(os.environ.get("RUN_MAX_STDOUT", "200000"))
+# Opt-in: share lstat results across tool calls for this long (seconds; 0 = off).
+# Filling it costs list_dir more than a hit saves stat() on local disks, so it
+# only pays off where stats are slow. Tools invalidate what they change;
+# changes made outside this server can be reported stale for up to the TTL.
+STAT_CACHE_TTL = float(os.environ.get("STAT_CACHE_TTL", "0"))
+STAT_CACHE_MAX = 4096
+# Stat list_dir entries from a thread pool (for network filesystems; adds overhead on local disks).
+PARALLEL_STAT = os.environ.get("MCP_PARALLEL_STAT", "0") == "1"
+PARALLEL_STAT_WORKERS = int(os.environ.get("MCP_PARALLEL_STAT_WORKERS", "32"))
+# read_text drops files at least this large from the page cache after reading.
+READ_DONTNEED_BYTES = int(os.environ.get("READ_DONTNEED_BYTES", str(8 * 1024 * 1024)))
 
 # ---------- Helpers ----------
+# Resolved sandbox root, cached so per-call path resolution is string-only.
+_ROOT_SRC = _ROOT_ABS = _ROOT_ABS_SEP = ""
+
+def _refresh_root() -> None:
+    global _ROOT_SRC, _ROOT_ABS, _ROOT_ABS_SEP
+    _ROOT_SRC = ROOT_DIR
+    _ROOT_ABS = os.path.abspath(ROOT_DIR)
+    _ROOT_ABS_SEP = os.path.join(_ROOT_ABS, "")
+
+_refresh_root()
+
 def ensure_root() -> None:
-    os.makedirs(ROOT_DIR, exist_ok=True)
+    if ROOT_DIR != _ROOT_SRC:
+        _refresh_root()
+    os.makedirs(_ROOT_ABS, exist_ok=True)
 
-def _abs(path: str) -> str:
-    base = os.path.abspath(ROOT_DIR)
-    target = os.path.abspath(os.path.join(base, path.lstrip("/\\")))
-    if not (target.startswith(base + os.sep) or target == base):
-        raise PermissionError("Path escapes sandbox root")
-    return target
+# Globs match case-insensitively on Windows, like PureWindowsPath.match/fnmatch.
+_GLOB_FLAGS = re.IGNORECASE if os.name == "nt" else 0
+
+def _compile_globs(patterns: List[str]) -> "re.Pattern[str]":
+    # One combined regex per glob list, so a policy check is a single re.match.
+    if not patterns:
+        return re.compile(r"(?!)")
+    return re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in patterns), _GLOB_FLAGS)
+
+def _split_deny(patterns: List[str]):
+    # Partition "**/NAME" / "**/NAME*" (basename) and "**/DIR/**" (suspect dir)
+    # globs so list_dir can usually decide on an entry from its name alone.
+    magic = re.compile(r"[*?\[]")
+    basename: List[str] = []
+    dirs: List[str] = []
+    other: List[str] = []
+    for pat in patterns:
+        tail = pat[3:] if pat.startswith("**/") else ""
+        if tail and "/" not in tail and not magic.search(tail.rstrip("*")):
+            basename.append(tail)
+        elif tail.endswith("/**") and not magic.search(tail[:-3]) and "/" not in tail[:-3]:
+            dirs.append(tail[:-3].lower() if _GLOB_FLAGS else tail[:-3])
+        else:
+            other.append(pat)
+    return _compile_globs(basename), frozenset(dirs), _compile_globs(other)
+
+def _compile_policy() -> None:
+    """(Re)build the policy regexes from ALLOW_GLOBS/DENY_GLOBS."""
+    global _DENY_RE, _ALLOW_RE, _BASENAME_DENY_RE, _SUSPECT_DIRS, _OTHER_DENY_RE
+    _DENY_RE = _compile_globs(DENY_GLOBS)
+    _ALLOW_RE = _compile_globs(ALLOW_GLOBS)
+    _BASENAME_DENY_RE, _SUSPECT_DIRS, _OTHER_DENY_RE = _split_deny(DENY_GLOBS)
+
+_compile_policy()
 
-def _deny_check(abs_path: str) -> None:
-    rel = os.path.relpath(abs_path, ROOT_DIR)
-    for pat in DENY_GLOBS:
-        if PurePath(rel).match(pat):
-            raise PermissionError(f"Denied by policy: {pat}")
+def _deny_check(rel: str) -> None:
+    if _DENY_RE.match(rel):
+        pat = next(p for p in DENY_GLOBS if re.match(fnmatch.translate(p), rel, _GLOB_FLAGS))
+        raise PermissionError(f"Denied by policy: {pat}")
 
-def _allow_check(abs_path: str) -> None:
-    rel = os.path.relpath(abs_path, ROOT_DIR)
-    if not any(PurePath(rel).match(pat) for pat in ALLOW_GLOBS):
+def _allow_check(rel: str) -> None:
+    if not _ALLOW_RE.match(rel):
         raise PermissionError("Not allowed by policy")
 
-def _policy(abs_path: str) -> None:
-    _deny_check(abs_path)
-    _allow_check(abs_path)
+def _policy_rel(rel: str) -> None:
+    _deny_check(rel)
+    _allow_check(rel)
+
+def _sandbox_path(path: str) -> Tuple[str, str]:
+    """Map a user-supplied path to ``(abs_path, rel_path)`` under the sandbox root.
+
+    Pure string work: the rel path is normalized with "/" separators and is
+    what the policy globs and tool results use.
+    """
+    if os.sep == "/":
+        p = path.lstrip("/\\")
+    else:
+        p = path.replace("\\", "/").lstrip("/")
+    rel = posixpath.normpath(p)
+    if rel == ".." or rel.startswith("../") or (os.sep != "/" and ":" in rel):
+        raise PermissionError("Path escapes sandbox root")
+    if rel == ".":
+        return _ROOT_ABS, rel
+    return _ROOT_ABS_SEP + (rel if os.sep == "/" else rel.replace("/", os.sep)), rel
+
+def _resolve(path: str) -> Tuple[str, str]:
+    ap, rel = _sandbox_path(path)
+    _policy_rel(rel)
+    return ap, rel
+
+def _entry_policy(prefix: str) -> Callable[[str], None]:
+    """Return a policy check for entry names of the directory at ``prefix`` ("" or "rel/")."""
+    parents = prefix[:-1].split("/") if prefix else []
+    if _GLOB_FLAGS:
+        parents = [c.lower() for c in parents]
+    if any(c in _SUSPECT_DIRS or _BASENAME_DENY_RE.match(c) for c in parents):
+        # A parent component may start a deny match: check the full rel path.
+        return lambda name: _policy_rel(prefix + name)
+    def check(name: str) -> None:
+        rel = prefix + name
+        # "**/" globs need a "/" before their tail, so at the root they can't match.
+        if (prefix and _BASENAME_DENY_RE.match(name)) or _OTHER_DENY_RE.match(rel):
+            _deny_check(rel)
+        _allow_check(rel)
+    return check
+
+# abs path -> (monotonic time, lstat result); LRU-ordered, bounded by STAT_CACHE_MAX.
+_STAT_CACHE: "OrderedDict[str, Tuple[float, os.stat_result]]" = OrderedDict()
+_STAT_LOCK = threading.Lock()
+# Bumped by every invalidation, so an lstat that raced one is not cached.
+_STAT_GEN = 0
+
+def _cached_lstat(ap: str, entry: Optional[os.DirEntry] = None) -> os.stat_result:
+    """lstat ``ap`` (via ``entry`` if given), reusing a result newer than STAT_CACHE_TTL."""
+    if STAT_CACHE_TTL <= 0:
+        return entry.stat(follow_symlinks=False) if entry is not None else os.lstat(ap)
+    now = time.monotonic()
+    with _STAT_LOCK:
+        hit = _STAT_CACHE.get(ap)
+        if hit is not None and now - hit[0] < STAT_CACHE_TTL:
+            _STAT_CACHE.move_to_end(ap)
+            return hit[1]
+        gen = _STAT_GEN
+    st = entry.stat(follow_symlinks=False) if entry is not None else os.lstat(ap)
+    with _STAT_LOCK:
+        if gen == _STAT_GEN:
+            _STAT_CACHE[ap] = (now, st)
+            _STAT_CACHE.move_to_end(ap)
+            if len(_STAT_CACHE) > STAT_CACHE_MAX:
+                _STAT_CACHE.popitem(last=False)
+    return st
+
+def _forget_stat(*paths: str, tree: bool = False) -> None:
+    """Drop cached stats for paths a tool changed, all their ancestors (covers
+    directories created on the way by makedirs) and, with tree, descendants."""
+    global _STAT_GEN
+    with _STAT_LOCK:
+        _STAT_GEN += 1
+        if not _STAT_CACHE:
+            return
+        for ap in paths:
+            _STAT_CACHE.pop(ap, None)
+            d = ap
+            while d != _ROOT_ABS and d.startswith(_ROOT_ABS_SEP):
+                d = os.path.dirname(d)
+                _STAT_CACHE.pop(d, None)
+            if tree:
+                sub = os.path.join(ap, "")
+                for k in [k for k in _STAT_CACHE if k.startswith(sub)]:
+                    del _STAT_CACHE[k]
+
+def _clear_stat_cache() -> None:
+    global _STAT_GEN
+    with _STAT_LOCK:
+        _STAT_GEN += 1
+        _STAT_CACHE.clear()
+
+# oct() strings for every permission-bit value, so results index instead of format.
+_MODE_TABLE = tuple(oct(i) for i in range(0o1000))
+
+_STAT_POOL: Optional[ThreadPoolExecutor] = (
+    ThreadPoolExecutor(max_workers=PARALLEL_STAT_WORKERS, thread_name_prefix="list_dir-stat")
+    if PARALLEL_STAT else None
+)
+
+# Normalized once so run() compares tuples even if COMMAND_ALLOWLIST is edited with lists.
+_COMMAND_ALLOWLIST: Dict[str, Tuple[str, ...]] = {
+    sys.intern(k): tuple(v) for k, v in COMMAND_ALLOWLIST.items()
+}
+
+_O_BINARY = getattr(os, "O_BINARY", 0)
+_SCANDIR_FD = os.scandir in os.supports_fd and hasattr(os, "O_DIRECTORY")
+
+# Smallest os.read request in _read_all: the EOF probe, or reads past the fstat size.
+_READ_MIN = 64 * 1024
+
+def _read_all(fd: int, size: int) -> bytes:
+    # Normally one read(2) of the whole file; loops on short reads and growth.
+    chunks: List[bytes] = []
+    got = 0
+    while True:
+        chunk = os.read(fd, max(size - got, _READ_MIN))
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+        got += len(chunk)
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+def _capture(pipe: Any, buf: bytearray) -> None:
+    # Keep the first RUN_MAX_STDOUT bytes; drain and drop the rest so the
+    # child never blocks on a full pipe and memory stays bounded.
+    with pipe:
+        for chunk in iter(lambda: pipe.read1(65536), b""):
+            room = RUN_MAX_STDOUT - len(buf)
+            if room > 0:
+                buf += chunk[:room]
+
+def _decode_output(buf: bytearray) -> str:
+    # The cap may split a multi-byte sequence, so don't decode strictly.
+    # Newlines are translated as text=True pipes would.
+    text = buf.decode(locale.getpreferredencoding(False), "replace")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+def _offload(fn):
+    """Under async transports, run blocking file I/O in a worker thread.
+
+    Tools stay plain ``def`` so stdio dispatches them inline with no thread hop.
+    """
+    if not ASYNC_IO:
+        return fn
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return wrapper
 
 # ---------- MCP ----------
+# FastMCP serializes tool results itself (pydantic_core, a native encoder) and
+# derives structured output from the return annotations, so tools return plain
+# dicts of str/int/bool rather than pre-encoded JSON.
 mcp = FastMCP("mcp-filesystem")
 
 @mcp.tool()
-def list_dir(path: str = ".", glob_pattern: str = "*", include_hidden: bool = False) -> Dict[str, Any]:
-    """List directory entries under sandbox root."""
+def list_dir(path: str = ".", glob_pattern: str = "*", include_hidden: bool = False, limit: int = 0) -> Dict[str, Any]:
+    """List directory entries under sandbox root (first ``limit`` by name if limit > 0)."""
     ensure_root()
-    ap = _abs(path)
+    ap, rel_dir = _sandbox_path(path)
     if not os.path.isdir(ap):
         raise FileNotFoundError("Not a directory")
-    out = []
-    for name in sorted(os.listdir(ap)):
-        if not include_hidden and name.startswith("."):  # hide dotfiles unless requested
-            continue
-        if not glob.fnmatch.fnmatch(name, glob_pattern):
-            continue
-        fp = os.path.join(ap, name)
-        try:
-            _policy(fp)
-            st = os.lstat(fp)
-            out.append({
-                "name": name,
-                "is_dir": os.path.isdir(fp),
-                "size": st.st_size,
-                "mode": oct(st.st_mode & 0o777),
-                "mtime": int(st.st_mtime),
-            })
-        except PermissionError:
-            continue
-    return {"path": os.path.relpath(ap, ROOT_DIR), "entries": out}
+    prefix = "" if rel_dir == "." else rel_dir + "/"
+    check = _entry_policy(prefix)
+    # Compile the filter once per call; fnmatch is case-insensitive on Windows.
+    name_match = None if glob_pattern == "*" else re.compile(
+        fnmatch.translate(glob_pattern), _GLOB_FLAGS).match
+    # Scan through a directory fd where supported: DirEntry.stat() then uses
+    # fstatat(dir_fd, name), so the directory path is resolved once, not per entry.
+    dir_fd = os.open(ap, os.O_RDONLY | os.O_DIRECTORY) if _SCANDIR_FD else None
+    try:
+        # Filter on names first so only the entries we return get sorted and stat'ed.
+        kept = []
+        with os.scandir(ap if dir_fd is None else dir_fd) as it:
+            for entry in it:
+                name = entry.name
+                if not include_hidden and name.startswith("."):  # hide dotfiles unless requested
+                    continue
+                if name_match is not None and not name_match(name):
+                    continue
+                try:
+                    check(name)
+                except PermissionError:
+                    continue
+                kept.append(entry)
+        by_name = operator.attrgetter("name")
+        entries = heapq.nsmallest(limit, kept, key=by_name) if limit > 0 else sorted(kept, key=by_name)
+        base = os.path.join(ap, "")
+        def entry_stat(entry: os.DirEntry) -> Optional[os.stat_result]:
+            try:
+                return _cached_lstat(base + entry.name, entry)
+            except PermissionError:
+                return None
+        # On high-latency filesystems (NFS/SMB) keep many stats in flight at once.
+        pool_map = _STAT_POOL.map if _STAT_POOL is not None and len(entries) > 1 else map
+        out: List[Dict[str, Any]] = []
+        append = out.append
+        for entry, st in zip(entries, pool_map(entry_stat, entries)):
+            if st is None:
+                continue
+            try:
+                # Literal keys are compile-time interned constants (one key tuple
+                # shared by every entry dict), so there is nothing to sys.intern here.
+                append({
+                    "name": entry.name,
+                    "is_dir": entry.is_dir(),
+                    "size": st.st_size,
+                    "mode": _MODE_TABLE[st.st_mode & 0o777],
+                    "mtime": int(st.st_mtime),
+                })
+            except PermissionError:
+                continue
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
+    return {"path": rel_dir, "entries": out}
 
 @mcp.tool()
+@_offload
 def read_text(path: str, encoding: str = "utf-8") -> Dict[str, Any]:
     """Read a text file."""
     ensure_root()
-    ap = _abs(path); _policy(ap)
+    ap, rel = _resolve(path)
     if not os.path.isfile(ap):
         raise FileNotFoundError("File not found")
-    with io.open(ap, "r", encoding=encoding, errors="strict") as f:
-        return {"path": os.path.relpath(ap, ROOT_DIR), "content": f.read()}
+    # Raw fd I/O: no FileIO/BufferedReader/TextIOWrapper stack, one buffer.
+    fd = os.open(ap, os.O_RDONLY | _O_BINARY)
+    try:
+        size = os.fstat(fd).st_size
+        fadvise = getattr(os, "posix_fadvise", None)
+        if fadvise:
+            fadvise(fd, 0, size, os.POSIX_FADV_SEQUENTIAL)
+        data = _read_all(fd, size)
+        if fadvise and size >= READ_DONTNEED_BYTES:
+            # One-shot big reads shouldn't evict the rest of the working set.
+            fadvise(fd, 0, size, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    text = data.decode(encoding, "strict")
+    if b"\r" in data:  # universal newlines, as text-mode reads did
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return {"path": rel, "content": text}
 
 @mcp.tool()
+@_offload
 def write_text(path: str, content: str, create_dirs: bool = True, overwrite: bool = True, encoding: str = "utf-8") -> Dict[str, Any]:
     """Write text to a file (safe under ROOT)."""
     ensure_root()
-    ap = _abs(path); _policy(ap)
-    d = os.path.dirname(ap)
-    if create_dirs:
-        os.makedirs(d, exist_ok=True)
-    if os.path.exists(ap) and not overwrite:
-        raise FileExistsError("File exists and overwrite=False")
-    with io.open(ap, "w", encoding=encoding) as f:
-        f.write(content)
-    return {"written": True, "path": os.path.relpath(ap, ROOT_DIR), "bytes": len(content.encode(encoding))}
+    ap, rel = _resolve(path)
+    if os.linesep != "\n":  # keep text-mode newlines ("\r\n" on Windows) despite O_BINARY
+        content = content.replace("\n", os.linesep)
+    data = content.encode(encoding)  # before open, so an encode error can't truncate the file
+    # overwrite=False: O_EXCL lets the kernel do the existence check atomically.
+    flags = os.O_WRONLY | os.O_CREAT | _O_BINARY | (os.O_TRUNC if overwrite else os.O_EXCL)
+    try:  # forget in finally: a failed makedirs or write may still have changed the tree
+        if create_dirs:
+            os.makedirs(os.path.dirname(ap), exist_ok=True)
+        try:
+            fd = os.open(ap, flags, 0o666)
+        except FileExistsError:
+            raise FileExistsError("File exists and overwrite=False") from None
+        try:
+            _write_all(fd, data)
+        finally:
+            os.close(fd)
+    finally:
+        _forget_stat(ap)
+    return {"written": True, "path": rel, "bytes": len(data)}
 
 @mcp.tool()
 def mkdir(path: str, parents: bool = True, exist_ok: bool = True) -> Dict[str, Any]:
     """Create a directory under ROOT."""
     ensure_root()
-    ap = _abs(path); _policy(ap)
-    if parents:
-        os.makedirs(ap, exist_ok=exist_ok)
-    else:
-        os.mkdir(ap)
-    return {"created": True, "path": os.path.relpath(ap, ROOT_DIR)}
+    ap, rel = _resolve(path)
+    try:
+        if parents:
+            os.makedirs(ap, exist_ok=exist_ok)
+        else:
+            os.mkdir(ap)
+    finally:
+        _forget_stat(ap)
+    return {"created": True, "path": rel}
 
 @mcp.tool()
 def mv(src: str, dst: str, overwrite: bool = False) -> Dict[str, Any]:
     """Move/rename file/dir within ROOT."""
     ensure_root()
-    aps = _abs(src); _policy(aps)
-    apd = _abs(dst); _policy(apd)
-    os.makedirs(os.path.dirname(apd), exist_ok=True)
-    if os.path.exists(apd) and not overwrite:
-        raise FileExistsError("Destination exists (overwrite=False)")
-    if overwrite and os.path.exists(apd):
-        if os.path.isdir(apd) and not os.path.islink(apd):
-            shutil.rmtree(apd)
-        else:
-            os.remove(apd)
-    shutil.move(aps, apd)
-    return {"moved": True, "src": os.path.relpath(aps, ROOT_DIR), "dst": os.path.relpath(apd, ROOT_DIR)}
+    aps, rel_src = _resolve(src)
+    apd, rel_dst = _resolve(dst)
+    if rel_src == "." or rel_dst == ".":
+        raise PermissionError("Cannot move the sandbox root")
+    try:
+        os.makedirs(os.path.dirname(apd), exist_ok=True)
+        try:
+            st = os.lstat(apd)
+        except FileNotFoundError:
+            st = None
+        if st is not None:
+            if not overwrite:
+                raise FileExistsError("Destination exists (overwrite=False)")
+            if S_ISDIR(st.st_mode):  # lstat: symlinks to dirs are unlinked, not followed
+                shutil.rmtree(apd)
+            else:
+                os.unlink(apd)
+        shutil.move(aps, apd)
+    finally:
+        _forget_stat(aps, apd, tree=True)
+    return {"moved": True, "src": rel_src, "dst": rel_dst}
 
 @mcp.tool()
 def rm(path: str, recursive: bool = False) -> Dict[str, Any]:
     """Remove file/dir under ROOT."""
     ensure_root()
-    ap = _abs(path); _policy(ap)
-    if os.path.isdir(ap) and not os.path.islink(ap):
-        if not recursive:
-            raise IsADirectoryError("Use recursive=True for directories")
-        shutil.rmtree(ap)
-    else:
-        os.remove(ap)
-    return {"removed": True, "path": os.path.relpath(ap, ROOT_DIR)}
+    ap, rel = _resolve(path)
+    if rel == ".":
+        raise PermissionError("Cannot remove the sandbox root")
+    try:
+        if os.path.isdir(ap) and not os.path.islink(ap):
+            if not recursive:
+                raise IsADirectoryError("Use recursive=True for directories")
+            shutil.rmtree(ap)
+        else:
+            os.remove(ap)
+    finally:
+        _forget_stat(ap, tree=True)
+    return {"removed": True, "path": rel}
 
 @mcp.tool()
 def stat(path: str) -> Dict[str, Any]:
     """Return basic stat() for a path under ROOT."""
     ensure_root()
-    ap = _abs(path); _policy(ap)
-    st = os.lstat(ap)
+    ap, rel = _resolve(path)
+    st = _cached_lstat(ap)
     return {
-        "path": os.path.relpath(ap, ROOT_DIR),
-        "is_dir": os.path.isdir(ap),
+        "path": rel,
+        "is_dir": S_ISDIR(st.st_mode) or (S_ISLNK(st.st_mode) and os.path.isdir(ap)),
         "size": st.st_size,
-        "mode": oct(st.st_mode & 0o777),
+        "mode": _MODE_TABLE[st.st_mode & 0o777],
         "mtime": int(st.st_mtime),
     }
 
@@ -184,39 +477,60 @@ def run(cmd: str, args: Optional[list] = None, cwd: str = ".", timeout_sec: int
     if not ENABLE_RUN_COMMANDS:
         raise PermissionError("run() is disabled by server policy")
     ensure_root()
-    ap_cwd = _abs(cwd); _policy(ap_cwd)
+    ap_cwd, _ = _resolve(cwd)
     base = os.path.basename(cmd)
-    prefix = COMMAND_ALLOWLIST.get(base)
+    prefix = _COMMAND_ALLOWLIST.get(base)
     if prefix is None:
         raise PermissionError(f"Command '{base}' not in allowlist")
     final_args = list(args or [])
-    if not final_args[:len(prefix)] == prefix:
-        raise PermissionError(f"Args must start with {prefix} for '{base}'")
+    if tuple(final_args[:len(prefix)]) != prefix:
+        raise PermissionError(f"Args must start with {list(prefix)} for '{base}'")
     argv = [cmd] + final_args
     start = time.time()
     try:
+        # No preexec_fn/user/group/umask: that keeps CPython (3.10+, Linux) on its
+        # vfork() fast path, so spawning doesn't copy this process's page tables.
+        # The posix_spawn path would need cwd=None and close_fds=False; both
+        # matter here (sandboxed cwd, no fd leaks into the child).
         proc = subprocess.Popen(
-            argv, cwd=ap_cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, shell=False
+            argv, cwd=ap_cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=False
         )
+        out, err = bytearray(), bytearray()
+        readers = [threading.Thread(target=_capture, args=a, daemon=True)
+                   for a in ((proc.stdout, out), (proc.stderr, err))]
+        for t in readers:
+            t.start()
+        deadline = time.monotonic() + timeout_sec
+        timed_out = False
         try:
-            out, err = proc.communicate(timeout=timeout_sec)
+            proc.wait(timeout=timeout_sec)
         except subprocess.TimeoutExpired:
             proc.kill()
-            out, err = proc.communicate()
-            return {"ok": False, "error": "timeout", "stdout": (out or "")[:RUN_MAX_STDOUT], "stderr": (err or "")[:RUN_MAX_STDOUT], "rc": None}
+            proc.wait()
+            timed_out = True
+        # Background children can hold the pipes open after proc exits, so the
+        # timeout covers draining them too; after a kill, allow a short grace.
+        join_by = time.monotonic() + 1.0 if timed_out else deadline
+        for t in readers:
+            t.join(max(join_by - time.monotonic(), 0))
+        if timed_out or any(t.is_alive() for t in readers):
+            return {"ok": False, "error": "timeout", "stdout": _decode_output(out), "stderr": _decode_output(err), "rc": None}
         return {
             "ok": proc.returncode == 0,
             "rc": proc.returncode,
-            "stdout": (out or "")[:RUN_MAX_STDOUT],
-            "stderr": (err or "")[:RUN_MAX_STDOUT],
+            "stdout": _decode_output(out),
+            "stderr": _decode_output(err),
             "elapsed_sec": round(time.time() - start, 3),
         }
     except Exception as e:
         return {"ok": False, "error": str(e)}
+    finally:
+        # The command may have changed anything under cwd.
+        _clear_stat_cache()
 
 if __name__ == "__main__":
     # Choose transport by env:
-    transport = os.environ.get("MCP_TRANSPORT", "stdio").lower()
+    transport = TRANSPORT
     if transport == "http":
         host = os.environ.get("MCP_HTTP_HOST", "0.0.0.0")
         port = int(os.environ.get("MCP_HTTP_PORT", "8080"))
@@ -0,0 +1,32 @@
+import pytest
+
+import server
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    """Point the server at a fresh sandbox; ensure_root() picks up the new ROOT_DIR."""
+    monkeypatch.setattr(server, "ROOT_DIR", str(tmp_path))
+    server.ensure_root()
+    server._clear_stat_cache()
+    return tmp_path
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    """Rebuild the policy regexes with other globs/flags; restored afterwards."""
+    def apply(deny=None, flags=None):
+        if deny is not None:
+            monkeypatch.setattr(server, "DENY_GLOBS", deny)
+        if flags is not None:
+            monkeypatch.setattr(server, "_GLOB_FLAGS", flags)
+        server._compile_policy()
+    yield apply
+    monkeypatch.undo()
+    server._compile_policy()
+
+
+@pytest.fixture
+def stat_cache(root, monkeypatch):
+    """Turn the (opt-in) stat cache on for one test."""
+    monkeypatch.setattr(server, "STAT_CACHE_TTL", 60.0)
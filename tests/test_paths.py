@@ -0,0 +1,63 @@
+import itertools
+import os
+
+import pytest
+
+import server
+
+
+def legacy_resolve(path):
+    # The pre-_sandbox_path logic (_abs + _rel), kept as the reference.
+    base = server._ROOT_ABS
+    target = os.path.normpath(os.path.join(base, path.lstrip("/\\")))
+    if not (target.startswith(os.path.join(base, "")) or target == base):
+        raise PermissionError("Path escapes sandbox root")
+    rel = "." if target == base else os.path.relpath(target, base).replace(os.sep, "/")
+    return target, rel
+
+
+def resolve_or_error(fn, path):
+    try:
+        return fn(path)
+    except PermissionError:
+        return "escapes"
+
+
+@pytest.mark.parametrize("path, rel", [
+    ("", "."),
+    (".", "."),
+    ("/", "."),
+    ("\\", "."),
+    ("a/./b/", "a/b"),
+    ("//a", "a"),
+    ("/a//b", "a/b"),
+    ("\\a", "a"),
+    ("a/..", "."),
+    ("a/b/../c", "a/c"),
+    ("..", "escapes"),
+    ("../x", "escapes"),
+    ("a/../../x", "escapes"),
+    ("/../x", "escapes"),
+])
+def test_sandbox_path_table(root, path, rel):
+    got = resolve_or_error(server._sandbox_path, path)
+    assert (got if got == "escapes" else got[1]) == rel
+
+
+def test_sandbox_path_matches_legacy(root):
+    comps = ["", ".", "..", "a", "b", "/", "//", "\\", ".git", "x\\y"]
+    for k in range(1, 5):
+        for parts in itertools.product(comps, repeat=k):
+            p = "/".join(parts)
+            assert resolve_or_error(server._sandbox_path, p) == resolve_or_error(legacy_resolve, p), p
+
+
+@pytest.mark.skipif(os.name != "nt", reason="drive letters only exist on Windows")
+@pytest.mark.parametrize("path", ["C:/Windows", "C:\\Windows", "a/C:x", "\\\\server\\share"])
+def test_sandbox_path_rejects_drives_on_windows(root, path):
+    if path.startswith("\\\\"):
+        # UNC prefix is stripped to a relative path, never a share.
+        assert server._sandbox_path(path)[1] == "server/share"
+    else:
+        with pytest.raises(PermissionError):
+            server._sandbox_path(path)
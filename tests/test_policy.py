@@ -0,0 +1,56 @@
+import itertools
+import re
+
+import pytest
+
+import server
+
+
+def denied(check, arg):
+    try:
+        check(arg)
+    except PermissionError:
+        return True
+    return False
+
+
+def test_default_deny_globs():
+    assert denied(server._policy_rel, "a/.env")
+    assert denied(server._policy_rel, "a/.git/config")
+    assert denied(server._policy_rel, "a/b/.ssh/id_rsa")
+    assert not denied(server._policy_rel, "a/readme.md")
+    assert not denied(server._policy_rel, ".")
+
+
+def test_deny_reports_matching_glob():
+    with pytest.raises(PermissionError, match=r"\*\*/\.git/\*\*"):
+        server._policy_rel("a/.git/config")
+
+
+def test_case_insensitive_policy(policy):
+    # What os.name == "nt" gets: PureWindowsPath.match ignored case.
+    policy(flags=re.IGNORECASE)
+    assert denied(server._policy_rel, "a/.ENV")
+    assert denied(server._policy_rel, "a/.SSH/id_rsa")
+    assert denied(server._entry_policy("a/.GIT/"), "config")
+    assert denied(server._entry_policy("a/"), ".Env.local")
+
+
+CUSTOM_DENY = ["*.pem", "**/secret", "**/a*b", "**/.env*", "**/.git/**", "**/x?/**", "build/**"]
+
+
+@pytest.mark.parametrize("deny, comps", [
+    (None, ["a", ".git", ".gitx", ".env", ".envrc", "x.env", "id_rsa", "id",
+            "node_modules", ".ssh", "src", "*", "git"]),
+    (CUSTOM_DENY, ["a", "ab", "a.b", "k.pem", "secret", "secrets", ".git", ".env",
+                   "xy", "build", "b"]),
+])
+def test_entry_policy_matches_full_policy(policy, deny, comps):
+    # list_dir's name-only fast path must hide exactly what _policy_rel denies.
+    policy(deny=deny)
+    for depth in range(4):
+        for parents in itertools.product(comps, repeat=depth):
+            prefix = "".join(c + "/" for c in parents)
+            check = server._entry_policy(prefix)
+            for name in comps:
+                assert denied(check, name) == denied(server._policy_rel, prefix + name), prefix + name
@@ -0,0 +1,193 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import server
+
+
+def test_rm_refuses_sandbox_root(root):
+    (root / "keep.txt").write_text("x")
+    for path in (".", "", "/", "a/.."):
+        with pytest.raises(PermissionError):
+            server.rm(path, recursive=True)
+    assert (root / "keep.txt").exists()
+
+
+def test_mv_refuses_sandbox_root(root):
+    (root / "a").mkdir()
+    (root / "keep.txt").write_text("x")
+    with pytest.raises(PermissionError):
+        server.mv("a", ".", overwrite=True)
+    with pytest.raises(PermissionError):
+        server.mv(".", "a/inner")
+    assert (root / "keep.txt").exists() and (root / "a").is_dir()
+
+
+def test_root_is_still_usable_for_listing_and_stat(root):
+    (root / "f.txt").write_text("x")
+    assert [e["name"] for e in server.list_dir(".")["entries"]] == ["f.txt"]
+    assert server.stat(".")["is_dir"] is True
+
+
+def test_rm_recursive_keeps_symlink_targets(root):
+    (root / "keep").mkdir()
+    (root / "keep" / "f.txt").write_text("x")
+    (root / "t" / "x").mkdir(parents=True)
+    (root / "t" / "x" / "g").write_text("y")
+    (root / "t" / "lnk").symlink_to(root / "keep")
+    with pytest.raises(IsADirectoryError):
+        server.rm("t")
+    server.rm("t", recursive=True)
+    assert not (root / "t").exists()
+    assert (root / "keep" / "f.txt").exists()
+
+
+@pytest.fixture
+def run_enabled(root, monkeypatch):
+    monkeypatch.setattr(server, "ENABLE_RUN_COMMANDS", True)
+
+
+def test_run_timeout_covers_background_children(run_enabled):
+    start = time.monotonic()
+    r = server.run("bash", ["-lc", "sleep 3 & echo hi"], timeout_sec=1)
+    assert r["ok"] is False and r["error"] == "timeout"
+    assert time.monotonic() - start < 2.5
+
+
+def test_run_caps_output_and_translates_newlines(run_enabled, monkeypatch):
+    monkeypatch.setattr(server, "RUN_MAX_STDOUT", 8)
+    r = server.run("bash", ["-lc", r"printf 'a\r\nb\rc'; head -c 100000 /dev/zero; exit 3"])
+    assert r["rc"] == 3 and r["ok"] is False
+    assert r["stdout"] == "a\nb\nc\0\0"  # cap counts raw bytes
+
+
+def test_stat_cache_forgets_ancestors_of_created_dirs(root, stat_cache):
+    (root / "a").mkdir()
+    server.stat("a")
+    assert str(root / "a") in server._STAT_CACHE
+    server.mkdir("a/b/c")
+    assert str(root / "a") not in server._STAT_CACHE
+
+    server.stat("a")
+    server.write_text("a/d/e/f.txt", "hi")
+    assert str(root / "a") not in server._STAT_CACHE
+
+
+def test_stat_cache_skips_result_raced_by_invalidation(root, stat_cache, monkeypatch):
+    (root / "f").write_text("1")
+    real_lstat = server.os.lstat
+
+    def lstat_then_invalidate(p):
+        st = real_lstat(p)
+        server._forget_stat(p)  # e.g. a concurrent write_text in another thread
+        return st
+
+    monkeypatch.setattr(server.os, "lstat", lstat_then_invalidate)
+    server.stat("f")
+    assert str(root / "f") not in server._STAT_CACHE
+
+
+def test_stat_cache_forgets_on_failed_mutation(root, stat_cache, monkeypatch):
+    (root / "f").write_text("old")
+    server.stat("f")
+
+    def fail(fd, data):
+        raise OSError("disk full")  # after O_TRUNC has emptied the file
+
+    monkeypatch.setattr(server, "_write_all", fail)
+    with pytest.raises(OSError):
+        server.write_text("f", "new")
+    assert str(root / "f") not in server._STAT_CACHE
+    assert server.stat("f")["size"] == 0
+
+
+def test_read_text_translates_newlines(root):
+    (root / "crlf.txt").write_bytes(b"x\r\ny\rz\n")
+    assert server.read_text("crlf.txt")["content"] == "x\ny\nz\n"
+    (root / "utf16.txt").write_bytes("a\r\nb".encode("utf-16-le"))
+    assert server.read_text("utf16.txt", encoding="utf-16-le")["content"] == "a\nb"
+
+
+def test_write_text_uses_platform_newlines(root, monkeypatch):
+    with monkeypatch.context() as m:
+        m.setattr(server.os, "linesep", "\r\n")  # as on Windows
+        assert server.write_text("w.txt", "a\nb")["bytes"] == 4
+        assert (root / "w.txt").read_bytes() == b"a\r\nb"
+    server.write_text("w.txt", "a\nb")
+    assert (root / "w.txt").read_bytes() == b"a\nb"
+
+
+def test_write_text_no_overwrite_leaves_file_untouched(root):
+    (root / "f.txt").write_text("old")
+    with pytest.raises(FileExistsError, match="overwrite=False"):
+        server.write_text("f.txt", "new", overwrite=False)
+    assert (root / "f.txt").read_text() == "old"
+    server.write_text("g.txt", "new", overwrite=False)
+    assert (root / "g.txt").read_text() == "new"
+
+
+def test_mv_existing_destination(root):
+    (root / "src.txt").write_text("src")
+    (root / "dst.txt").write_text("dst")
+    with pytest.raises(FileExistsError):
+        server.mv("src.txt", "dst.txt")
+    assert (root / "src.txt").read_text() == "src"
+    assert (root / "dst.txt").read_text() == "dst"
+
+
+def test_mv_dangling_symlink_counts_as_existing(root):
+    (root / "src.txt").write_text("src")
+    (root / "dst.txt").symlink_to(root / "missing")
+    with pytest.raises(FileExistsError):
+        server.mv("src.txt", "dst.txt")
+    assert (root / "dst.txt").is_symlink()
+    server.mv("src.txt", "dst.txt", overwrite=True)
+    assert not (root / "dst.txt").is_symlink()
+    assert (root / "dst.txt").read_text() == "src"
+
+
+def names(listing):
+    return [e["name"] for e in listing["entries"]]
+
+
+def test_list_dir_limit(root):
+    for n in ("e.txt", "a.md", "c.txt", ".hidden.txt", "b.txt", "id_rsa", "d.txt"):
+        (root / "dir" / n).parent.mkdir(exist_ok=True)
+        (root / "dir" / n).write_text("x")
+    full = names(server.list_dir("dir"))
+    assert full == ["a.md", "b.txt", "c.txt", "d.txt", "e.txt"]  # id_rsa denied, dotfile hidden
+    for limit in range(1, 7):
+        assert names(server.list_dir("dir", limit=limit)) == full[:limit]
+    for limit in (0, -1):
+        assert names(server.list_dir("dir", limit=limit)) == full
+    # limit counts entries left after the glob/hidden/policy filters.
+    assert names(server.list_dir("dir", glob_pattern="*.txt", limit=2)) == ["b.txt", "c.txt"]
+    assert names(server.list_dir("dir", include_hidden=True, limit=1)) == [".hidden.txt"]
+
+
+def test_stat_cache_off_by_default(root):
+    (root / "f").write_text("1")
+    server.stat("f")
+    server.list_dir(".")
+    assert not server._STAT_CACHE
+
+
+@pytest.mark.skipif(not server._SCANDIR_FD, reason="no os.scandir(dir_fd) here")
+def test_list_dir_stat_pool_matches_serial(root, stat_cache, monkeypatch):
+    d = root / "many"
+    d.mkdir()
+    for i in range(200):
+        (d / f"f{i:03d}.txt").write_text("x" * i)
+    (d / "sub").mkdir()
+    (d / "link").symlink_to("f001.txt")
+    serial = server.list_dir("many")
+    assert len(serial["entries"]) == 202
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        monkeypatch.setattr(server, "_STAT_POOL", pool)
+        server._clear_stat_cache()
+        assert server.list_dir("many") == serial  # cold: the pool fills the cache
+        assert str(d / "f199.txt") in server._STAT_CACHE
+        assert server.list_dir("many") == serial  # warm: served from the cache
+        assert server.list_dir("many", limit=50)["entries"] == serial["entries"][:50]